@@ -7,7 +7,9 @@ DASH DB CLEANUP PANEL – RAILWAY READY (ADVANCED + COLUMN CONTROL)
 FEATURES
 --------
 ✔ Delete rows before a date (column selectable)
+✔ Convert a table to monthly partitions (old months are dropped, not deleted)
 ✔ Delete entire table (explicit confirmation required)
+✔ Empty a table with TRUNCATE, keeping its schema (explicit confirmation required)
 ✔ Add column to selected table
 ✔ Drop column from selected table (explicit confirmation required)
 ✔ Lists all user tables & columns (public schema)
@@ -15,11 +17,25 @@ FEATURES
 """
 
 import os
-import psycopg2
-from datetime import date
+import re
+import json
+import atexit
+import hashlib
+import logging
+import threading
+import diskcache
+from psycopg import sql
+from psycopg_pool import ConnectionPool
+from cachetools import TTLCache, cached
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 
 import dash
-from dash import html, dcc, Input, Output, State
+from flask import jsonify, request
+from flask_compress import Compress
+from dash import (
+    html, dcc, Input, Output, State, DiskcacheManager, clientside_callback,
+)
 import dash_bootstrap_components as dbc
 
 # =========================================================
@@ -30,246 +46,1049 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL env var not found")
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+SCHEMA_CACHE_TTL = int(os.getenv("SCHEMA_CACHE_TTL", 60))
+SCHEMA_FETCH_SIZE = int(os.getenv("SCHEMA_FETCH_SIZE", 10000))
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", 10000))
+DELETE_INDEX_MIN_ROWS = int(os.getenv("DELETE_INDEX_MIN_ROWS", 100000))
+VACUUM_MIN_ROWS = int(os.getenv("VACUUM_MIN_ROWS", 10000))
+# Upper bound on the monthly partitions one conversion may create; a stray
+# date far in the past would otherwise mean thousands of partitions, all
+# built while writes are blocked.
+PARTITION_MAX_MONTHS = int(os.getenv("PARTITION_MAX_MONTHS", 240))
+# Background job results and the schema generation counter live here. Every
+# gunicorn worker must see the same directory for DDL in one worker to
+# invalidate the schema caches of the others, so the default is anchored to
+# this file rather than to the worker's current directory.
+CALLBACK_CACHE_DIR = os.getenv(
+    "CALLBACK_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"),
+)
+
+COLUMN_TYPES = ["TEXT", "INTEGER", "NUMERIC", "BOOLEAN", "DATE", "TIMESTAMP"]
+
+DATE_TYPES = frozenset({
+    "date",
+    "timestamp without time zone",
+    "timestamp with time zone",
+})
+
+logger = logging.getLogger(__name__)
+
 # =========================================================
-# DB HELPERS
+# CONNECTION POOL
 # =========================================================
 
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    # Background callbacks run in forked processes. Connections inherited
+    # from the parent share its sockets, so every process opens its own pool.
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool_pid != os.getpid():
+            # prepare_threshold=1 makes psycopg prepare a statement server-side
+            # from its second execution on a connection, so the repeated
+            # metadata SELECTs and the batched DELETE skip parsing and planning
+            # after the first call.
+            _pool = ConnectionPool(
+                DATABASE_URL,
+                min_size=1,
+                max_size=DB_POOL_SIZE,
+                kwargs={"sslmode": "require", "prepare_threshold": 1},
+                open=True,
+            )
+            _pool_pid = os.getpid()
+            atexit.register(_pool.close)
+        return _pool
+
 def get_conn():
-    return psycopg2.connect(DATABASE_URL, sslmode="require")
+    # Commits on success, rolls back on error, then returns the connection.
+    return get_pool().connection()
+
+@contextmanager
+def get_autocommit_conn():
+    # For statements that cannot run inside a transaction block, such as
+    # CREATE INDEX CONCURRENTLY and VACUUM.
+    with get_conn() as conn:
+        conn.autocommit = True
+        try:
+            yield conn
+        finally:
+            conn.autocommit = False
+
+@contextmanager
+def get_read_cursor():
+    # The hot metadata SELECTs reuse one cursor per pooled connection rather
+    # than allocating a fresh one per query. Writers keep their own cursors
+    # so no statement state leaks between them.
+    with get_conn() as conn:
+        cur = getattr(conn, "_dash_cur", None)
+        if cur is None or cur.closed:
+            cur = conn._dash_cur = conn.cursor()
+        yield cur
+
+# =========================================================
+# DB HELPERS
+# =========================================================
 
+# On-disk cache shared by every process on the host: the web workers and the
+# background callback jobs they fork.
+shared_cache = diskcache.Cache(CALLBACK_CACHE_DIR)
+
+SCHEMA_GENERATION_KEY = "schema_generation"
+
+def schema_generation():
+    return shared_cache.get(SCHEMA_GENERATION_KEY, 0)
+
+# Schema metadata rarely changes between DDL operations, so it is served
+# from memory. Every cache key includes the shared schema generation, which
+# the DDL helpers bump, so a change made in any process invalidates the
+# cached schema in all of them. On a cache miss the table and column lookups
+# run as server-side prepared statements (prepare=True), so they are planned
+# once per pooled connection.
+_schema_lock = threading.Lock()
+
+@cached(
+    TTLCache(maxsize=1, ttl=SCHEMA_CACHE_TTL),
+    key=schema_generation,
+    lock=_schema_lock,
+)
 def fetch_tables():
-    with get_conn() as conn, conn.cursor() as cur:
+    with get_read_cursor() as cur:
         cur.execute("""
-            SELECT tablename
-            FROM pg_tables
-            WHERE schemaname = 'public'
-            ORDER BY tablename
-        """)
+            SELECT c.relname
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public'
+              AND c.relkind IN ('r', 'p')
+              AND NOT c.relispartition
+            ORDER BY c.relname
+        """, prepare=True)
         return [r[0] for r in cur.fetchall()]
 
-def fetch_date_columns(table_name):
-    with get_conn() as conn, conn.cursor() as cur:
+@cached(
+    TTLCache(maxsize=128, ttl=SCHEMA_CACHE_TTL),
+    key=lambda table_name: (table_name, schema_generation()),
+    lock=_schema_lock,
+)
+def fetch_columns_with_types(table_name):
+    with get_read_cursor() as cur:
         cur.execute("""
-            SELECT column_name
+            SELECT column_name, data_type
             FROM information_schema.columns
             WHERE table_schema = 'public'
               AND table_name = %s
-              AND data_type IN (
-                  'date',
-                  'timestamp without time zone',
-                  'timestamp with time zone'
-              )
             ORDER BY column_name
-        """, (table_name,))
-        return [r[0] for r in cur.fetchall()]
+        """, (table_name,), prepare=True)
+        return cur.fetchall()
 
-def fetch_all_columns(table_name):
-    with get_conn() as conn, conn.cursor() as cur:
+@cached(
+    TTLCache(maxsize=1, ttl=SCHEMA_CACHE_TTL),
+    key=schema_generation,
+    lock=_schema_lock,
+)
+def build_full_schema():
+    """{table: [[column, data_type], ...]} for every table in public."""
+    # Large databases have many thousands of columns; a server-side cursor
+    # streams them in SCHEMA_FETCH_SIZE chunks instead of buffering the whole
+    # result client-side before it is regrouped.
+    with get_conn() as conn, conn.cursor(name="schema_stream") as cur:
+        cur.itersize = SCHEMA_FETCH_SIZE
         cur.execute("""
-            SELECT column_name
+            SELECT table_name, column_name, data_type
             FROM information_schema.columns
             WHERE table_schema = 'public'
-              AND table_name = %s
-            ORDER BY column_name
-        """, (table_name,))
-        return [r[0] for r in cur.fetchall()]
+            ORDER BY table_name, column_name
+        """)
+        schema = {}
+        for table, column, data_type in cur:
+            schema.setdefault(table, []).append([column, data_type])
+        return schema
+
+def invalidate_schema_cache():
+    # incr is atomic across processes; entries cached under the old
+    # generation are simply never looked up again and age out.
+    shared_cache.incr(SCHEMA_GENERATION_KEY, default=0)
 
-def delete_before_date(table_name, column_name, cutoff_date):
+def ensure_delete_index(table_name, column_name):
+    """Index the cutoff column of a large table so the DELETE can avoid a
+    sequential scan. Returns the name of the created index, or None."""
     with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT
+                c.reltuples,
+                EXISTS (
+                    SELECT 1
+                    FROM pg_index i
+                    JOIN pg_attribute a
+                      ON a.attrelid = i.indrelid
+                     AND a.attnum = i.indkey[0]
+                    WHERE i.indrelid = c.oid
+                      AND i.indisvalid
+                      AND a.attname = %(column)s
+                ),
+                (
+                    SELECT s.correlation
+                    FROM pg_stats s
+                    WHERE s.schemaname = 'public'
+                      AND s.tablename = %(table)s
+                      AND s.attname = %(column)s
+                )
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public'
+              AND c.relname = %(table)s
+        """, {"table": table_name, "column": column_name})
+        row = cur.fetchone()
+
+    if row is None:
+        return None
+
+    reltuples, has_index, correlation = row
+    if has_index or reltuples < DELETE_INDEX_MIN_ROWS:
+        return None
+
+    # BRIN is tiny and cheap to build, but only useful when the physical row
+    # order follows the column (e.g. append-only timestamps).
+    method = "brin" if correlation is not None and abs(correlation) > 0.9 else "btree"
+    # No IF NOT EXISTS: the check above already found no usable index, so a
+    # clash with this name should fail loudly rather than be reported as built.
+    index_name = derived_name(f"idx_{table_name}_{column_name}", "_del")
+
+    with get_autocommit_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            sql.SQL(
+                "CREATE INDEX CONCURRENTLY {i} ON {t} USING {m} ({c})"
+            ).format(
+                i=sql.Identifier(index_name),
+                t=sql.Identifier(table_name),
+                m=sql.SQL(method),
+                c=sql.Identifier(column_name),
+            )
+        )
+    return index_name
+
+def delete_before_date(table_name, column_name, cutoff_date, on_batch=None):
+    # Delete in bounded batches, committing each one, so a large purge never
+    # holds millions of row locks in a single long-running transaction.
+    # on_batch, if given, is called with the running total after each batch.
+    # A ctid is only unique within one physical table, so rows are matched on
+    # (tableoid, ctid) to stay correct for partitioned and inherited tables,
+    # and the cutoff is re-checked in case a row was updated in between.
+    total = 0
+    with get_conn() as conn, conn.cursor() as cur:
+        while True:
+            cur.execute(
+                sql.SQL("""
+                WITH batch AS (
+                    SELECT tableoid, ctid
+                    FROM {t}
+                    WHERE {c} < %(cutoff)s
+                    LIMIT %(limit)s
+                    FOR UPDATE
+                )
+                DELETE FROM {t}
+                WHERE (tableoid, ctid) IN (SELECT tableoid, ctid FROM batch)
+                  AND {c} < %(cutoff)s
+                """).format(
+                    t=sql.Identifier(table_name),
+                    c=sql.Identifier(column_name),
+                ),
+                {"cutoff": cutoff_date, "limit": DELETE_BATCH_SIZE}
+            )
+            deleted = cur.rowcount
+            conn.commit()
+            total += deleted
+            if deleted < DELETE_BATCH_SIZE:
+                break
+            if on_batch:
+                on_batch(total)
+
+    # A large purge leaves dead tuples and stale planner statistics behind;
+    # reclaim them now rather than waiting for autovacuum.
+    if total > VACUUM_MIN_ROWS:
+        try:
+            with get_autocommit_conn() as conn, conn.cursor() as cur:
+                cur.execute(
+                    sql.SQL("VACUUM (ANALYZE) {t}").format(
+                        t=sql.Identifier(table_name)
+                    )
+                )
+        except Exception:
+            logger.exception("VACUUM (ANALYZE) of %s failed", table_name)
+
+    return total
+
+def derived_name(table_name, suffix):
+    """table_name + suffix, kept within PostgreSQL's 63-byte identifier limit.
+    When too long, the table part is shortened and tagged with a hash of the
+    full name so derived names stay distinct from each other and the table."""
+    name = table_name + suffix
+    if len(name.encode()) <= 63:
+        return name
+
+    digest = hashlib.md5(table_name.encode()).hexdigest()[:8]
+    room = 63 - len(suffix.encode()) - len(digest) - 1
+    head = table_name.encode()[:room].decode(errors="ignore")
+    return f"{head}_{digest}{suffix}"
+
+def find_partitioning_blockers(cur, table_ref):
+    """Objects that convert_to_monthly_partitioned() cannot carry over to the
+    rebuilt table, one line each."""
+    cur.execute("""
+        WITH r AS (SELECT %(rel)s::regclass AS oid)
+        SELECT 'it is already partitioned or is a partition'
+        FROM pg_class c, r
+        WHERE c.oid = r.oid AND (c.relkind = 'p' OR c.relispartition)
+        UNION ALL
+        SELECT 'it takes part in table inheritance'
+        FROM pg_class c, r
+        WHERE c.oid = r.oid AND c.relkind = 'r' AND NOT c.relispartition
+          AND EXISTS (
+              SELECT 1 FROM pg_inherits
+              WHERE inhrelid = r.oid OR inhparent = r.oid
+          )
+        UNION ALL
+        SELECT format('it is owned by %%I, not the connecting role',
+                      pg_get_userbyid(c.relowner))
+        FROM pg_class c, r
+        WHERE c.oid = r.oid AND pg_get_userbyid(c.relowner) <> current_user
+        UNION ALL
+        SELECT format('trigger %%I', t.tgname)
+        FROM pg_trigger t, r
+        WHERE t.tgrelid = r.oid AND NOT t.tgisinternal
+        UNION ALL
+        SELECT 'row level security is enabled'
+        FROM pg_class c, r
+        WHERE c.oid = r.oid AND c.relrowsecurity
+        UNION ALL
+        SELECT format('policy %%I', p.polname)
+        FROM pg_policy p, r
+        WHERE p.polrelid = r.oid
+        UNION ALL
+        SELECT format('foreign key %%I on %%s references it',
+                      con.conname, con.conrelid::regclass)
+        FROM pg_constraint con, r
+        WHERE con.confrelid = r.oid AND con.contype = 'f'
+          AND con.conparentid = 0
+        UNION ALL
+        SELECT format('view %%s depends on it', v.ev_class::regclass)
+        FROM (
+            SELECT DISTINCT rw.ev_class
+            FROM r, pg_depend d
+            JOIN pg_rewrite rw ON rw.oid = d.objid
+            WHERE d.classid = 'pg_rewrite'::regclass
+              AND d.refobjid = r.oid
+              AND rw.ev_class <> r.oid
+        ) v
+        UNION ALL
+        SELECT format('rule %%I', rw.rulename)
+        FROM pg_rewrite rw, r
+        WHERE rw.ev_class = r.oid
+        UNION ALL
+        SELECT format('storage parameters are set (%%s)',
+                      array_to_string(c.reloptions, ', '))
+        FROM pg_class c, r
+        WHERE c.oid = r.oid AND cardinality(c.reloptions) > 0
+        UNION ALL
+        SELECT format('column %%I has column-level grants', a.attname)
+        FROM pg_attribute a, r
+        WHERE a.attrelid = r.oid AND a.attacl IS NOT NULL
+        UNION ALL
+        SELECT format('index %%s is a partial, expression or exclusion index',
+                      i.indexrelid::regclass)
+        FROM pg_index i, r
+        WHERE i.indrelid = r.oid
+          AND (i.indisunique OR i.indisexclusion)
+          AND (i.indexprs IS NOT NULL OR i.indpred IS NOT NULL
+               OR i.indisexclusion)
+        UNION ALL
+        -- Unique keys are rebuilt from their key columns alone, so anything
+        -- else that shapes them would be lost. indnullsnotdistinct is read
+        -- through to_jsonb() because it only exists from PostgreSQL 15.
+        SELECT format('unique index %%s uses INCLUDE, a non-default operator '
+                      'class or collation, a sort order or NULLS NOT DISTINCT',
+                      i.indexrelid::regclass)
+        FROM pg_index i, r
+        WHERE i.indrelid = r.oid
+          AND i.indisunique
+          AND (
+              i.indnatts <> i.indnkeyatts
+              OR EXISTS (
+                  SELECT 1 FROM unnest(i.indoption) AS o(flags) WHERE o.flags <> 0
+              )
+              OR EXISTS (
+                  SELECT 1
+                  FROM unnest(i.indclass) AS oc(oid)
+                  JOIN pg_opclass opc ON opc.oid = oc.oid
+                  WHERE NOT opc.opcdefault
+              )
+              OR EXISTS (
+                  SELECT 1
+                  FROM unnest(i.indkey, i.indcollation) AS k(attnum, coll)
+                  JOIN pg_attribute a
+                    ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                  WHERE k.coll <> 0 AND k.coll <> a.attcollation
+              )
+              OR coalesce((to_jsonb(i) ->> 'indnullsnotdistinct')::boolean, false)
+          )
+    """, {"rel": table_ref})
+    return [r[0] for r in cur.fetchall()]
+
+def convert_to_monthly_partitioned(table_name, date_column):
+    """Rebuild a table as RANGE-partitioned by month on date_column, so old
+    rows can later be removed by dropping whole partitions. Returns the
+    number of monthly partitions created.
+
+    Indexes, unique keys (extended with date_column), foreign keys to other
+    tables, the table comment, table grants and sequences are carried over.
+    Raises ValueError without changing anything when the table has objects
+    that would be lost, such as triggers, rules, policies, storage
+    parameters, dependent views or incoming foreign keys."""
+    staging = derived_name(table_name, "__partitioned")
+    retired = derived_name(table_name, "__unpartitioned")
+    t = sql.Identifier(table_name)
+    st = sql.Identifier(staging)
+    c = sql.Identifier(date_column)
+
+    with get_conn() as conn, conn.cursor() as cur:
+        # Block writes for the duration of the copy so none are lost.
+        cur.execute(sql.SQL("LOCK TABLE {t} IN SHARE MODE").format(t=t))
+
+        blockers = find_partitioning_blockers(cur, t.as_string(conn))
+        if blockers:
+            raise ValueError(
+                f"Cannot partition {table_name}: " + "; ".join(blockers)
+            )
+
         cur.execute(
-            f"DELETE FROM {table_name} WHERE {column_name} < %s",
-            (cutoff_date,)
+            sql.SQL(
+                "SELECT date_trunc('month', min({c}))::date, max({c})::date FROM {t}"
+            ).format(t=t, c=c)
         )
-        deleted = cur.rowcount
+        first_month, last_day = cur.fetchone()
+
+        if first_month is not None:
+            span = (
+                (last_day.year - first_month.year) * 12
+                + last_day.month - first_month.month + 1
+            )
+            if span > PARTITION_MAX_MONTHS:
+                raise ValueError(
+                    f"Cannot partition {table_name}: {date_column} spans "
+                    f"{span} months ({first_month} to {last_day}), more than "
+                    f"PARTITION_MAX_MONTHS ({PARTITION_MAX_MONTHS}). Remove "
+                    f"outlier dates or raise the limit."
+                )
+
+        # Unique indexes on a partitioned table must contain the partition
+        # key, so indexes are recreated below rather than copied by LIKE.
+        cur.execute(
+            sql.SQL("""
+                CREATE TABLE {st} (LIKE {t} INCLUDING ALL EXCLUDING INDEXES)
+                PARTITION BY RANGE ({c})
+            """).format(st=st, t=t, c=c)
+        )
+
+        months = 0
+        month = first_month
+        while month is not None and month <= last_day:
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            cur.execute(
+                sql.SQL(
+                    "CREATE TABLE {p} PARTITION OF {st} FOR VALUES FROM ({lo}) TO ({hi})"
+                ).format(
+                    p=sql.Identifier(derived_name(table_name, f"_p{month:%Y%m}")),
+                    st=st,
+                    lo=sql.Literal(month.isoformat()),
+                    hi=sql.Literal(next_month.isoformat()),
+                )
+            )
+            months += 1
+            month = next_month
+
+        cur.execute(
+            sql.SQL("CREATE TABLE {p} PARTITION OF {st} DEFAULT").format(
+                p=sql.Identifier(derived_name(table_name, "_default")),
+                st=st,
+            )
+        )
+
+        cur.execute(
+            sql.SQL("""
+                SELECT i.indisunique, con.contype,
+                       pg_get_indexdef(i.indexrelid),
+                       ARRAY(
+                           SELECT a.attname
+                           FROM unnest(i.indkey[0:i.indnkeyatts - 1])
+                                WITH ORDINALITY AS k(attnum, ord)
+                           JOIN pg_attribute a
+                             ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                           ORDER BY k.ord
+                       )
+                FROM pg_index i
+                LEFT JOIN pg_constraint con
+                  ON con.conindid = i.indexrelid AND con.contype IN ('p', 'u')
+                WHERE i.indrelid = {rel}::regclass
+            """).format(rel=sql.Literal(t.as_string(conn)))
+        )
+        for is_unique, contype, indexdef, columns in cur.fetchall():
+            if is_unique:
+                # Unique keys on a partitioned table must include the
+                # partition key.
+                if date_column not in columns:
+                    columns.append(date_column)
+                cols = sql.SQL(", ").join(map(sql.Identifier, columns))
+                if contype == "p":
+                    statement = "ALTER TABLE {st} ADD PRIMARY KEY ({cols})"
+                elif contype == "u":
+                    statement = "ALTER TABLE {st} ADD UNIQUE ({cols})"
+                else:
+                    statement = "CREATE UNIQUE INDEX ON {st} ({cols})"
+                cur.execute(sql.SQL(statement).format(st=st, cols=cols))
+            else:
+                # "CREATE INDEX name ON tbl USING method (...)" -> keep the
+                # "USING ..." tail and point it at the new table.
+                method_and_keys = indexdef.split(" USING ", 1)[1]
+                cur.execute(
+                    sql.SQL("CREATE INDEX ON {st} USING ").format(st=st)
+                    + sql.SQL(method_and_keys)
+                )
+
+        # Generated columns are recomputed on insert and cannot be copied.
+        cur.execute("""
+            SELECT attname
+            FROM pg_attribute
+            WHERE attrelid = %s::regclass
+              AND attnum > 0
+              AND NOT attisdropped
+              AND attgenerated = ''
+            ORDER BY attnum
+        """, (t.as_string(conn),))
+        cols = sql.SQL(", ").join(
+            sql.Identifier(column) for (column,) in cur.fetchall()
+        )
+        cur.execute(
+            sql.SQL(
+                "INSERT INTO {st} ({cols}) OVERRIDING SYSTEM VALUE SELECT {cols} FROM {t}"
+            ).format(st=st, t=t, cols=cols)
+        )
+
+        # Foreign keys to other tables are added after the copy so each is
+        # validated once.
+        cur.execute("""
+            SELECT conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass
+              AND contype = 'f'
+        """, (t.as_string(conn),))
+        for name, definition in cur.fetchall():
+            cur.execute(
+                sql.SQL("ALTER TABLE {st} ADD CONSTRAINT {n} ").format(
+                    st=st, n=sql.Identifier(name)
+                )
+                + sql.SQL(definition)
+            )
+
+        # LIKE copies column comments but not the table's own.
+        cur.execute(
+            "SELECT obj_description(%s::regclass, 'pg_class')",
+            (t.as_string(conn),),
+        )
+        comment = cur.fetchone()[0]
+        if comment is not None:
+            cur.execute(
+                sql.SQL("COMMENT ON TABLE {st} IS {c}").format(
+                    st=st, c=sql.Literal(comment)
+                )
+            )
+
+        # LIKE never copies privileges; replay the table-level grants.
+        cur.execute("""
+            SELECT pg_get_userbyid(a.grantee), a.grantee = 0,
+                   a.privilege_type, a.is_grantable
+            FROM pg_class c, aclexplode(c.relacl) a
+            WHERE c.oid = %s::regclass
+        """, (t.as_string(conn),))
+        for grantee, is_public, privilege, is_grantable in cur.fetchall():
+            cur.execute(
+                sql.SQL("GRANT {p} ON {st} TO {g}{o}").format(
+                    p=sql.SQL(privilege),
+                    st=st,
+                    g=sql.SQL("PUBLIC") if is_public else sql.Identifier(grantee),
+                    o=sql.SQL(" WITH GRANT OPTION" if is_grantable else ""),
+                )
+            )
+
+        # LIKE gives identity columns fresh sequences; move them past the
+        # copied values.
+        cur.execute("""
+            SELECT attname
+            FROM pg_attribute
+            WHERE attrelid = %s::regclass
+              AND attidentity <> ''
+        """, (st.as_string(conn),))
+        for (column,) in cur.fetchall():
+            cur.execute(
+                sql.SQL("""
+                    SELECT setval(pg_get_serial_sequence({rel}, {col}), max({c}))
+                    FROM {st}
+                    HAVING max({c}) IS NOT NULL
+                """).format(
+                    rel=sql.Literal(st.as_string(conn)),
+                    col=sql.Literal(column),
+                    c=sql.Identifier(column),
+                    st=st,
+                )
+            )
+
+        # serial columns keep their sequence; hand ownership to the new table
+        # so it survives dropping the old one.
+        cur.execute("""
+            SELECT sn.nspname, s.relname, a.attname
+            FROM pg_depend d
+            JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+            JOIN pg_namespace sn ON sn.oid = s.relnamespace
+            JOIN pg_attribute a
+              ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+            WHERE d.refobjid = %s::regclass
+              AND d.deptype = 'a'
+        """, (t.as_string(conn),))
+        for seq_schema, seq_name, column in cur.fetchall():
+            cur.execute(
+                sql.SQL("ALTER SEQUENCE {s} OWNED BY {st}.{c}").format(
+                    s=sql.Identifier(seq_schema, seq_name),
+                    st=st,
+                    c=sql.Identifier(column),
+                )
+            )
+
+        cur.execute(
+            sql.SQL("ALTER TABLE {t} RENAME TO {r}").format(
+                t=t, r=sql.Identifier(retired)
+            )
+        )
+        cur.execute(
+            sql.SQL("ALTER TABLE {st} RENAME TO {t}").format(st=st, t=t)
+        )
+        cur.execute(sql.SQL("DROP TABLE {r}").format(r=sql.Identifier(retired)))
         conn.commit()
-        return deleted
 
-def drop_table(table_name):
+    invalidate_schema_cache()
+    return months
+
+def drop_partitions_before(table_name, column_name, cutoff_date):
+    """If table_name is RANGE-partitioned on column_name, drop every partition
+    that lies entirely before cutoff_date. Dropping a partition is a metadata
+    change, whatever its size. Returns a (partition name, row count) pair per
+    dropped partition; the count is the planner estimate when the partition
+    has been analyzed, so the drop never has to scan it."""
     with get_conn() as conn, conn.cursor() as cur:
-        cur.execute(f"DROP TABLE {table_name}")
+        cur.execute("""
+            SELECT cn.nspname, child.relname,
+                   pg_get_expr(child.relpartbound, child.oid),
+                   child.reltuples
+            FROM pg_partitioned_table pt
+            JOIN pg_class parent ON parent.oid = pt.partrelid
+            JOIN pg_namespace n ON n.oid = parent.relnamespace
+            JOIN pg_attribute a
+              ON a.attrelid = parent.oid AND a.attnum = pt.partattrs[0]
+            JOIN pg_inherits i ON i.inhparent = parent.oid
+            JOIN pg_class child ON child.oid = i.inhrelid
+            JOIN pg_namespace cn ON cn.oid = child.relnamespace
+            WHERE n.nspname = 'public'
+              AND parent.relname = %s
+              AND pt.partstrat = 'r'
+              AND pt.partnatts = 1
+              AND a.attname = %s
+        """, (table_name, column_name))
+
+        cutoff = datetime.fromisoformat(cutoff_date)
+        expired = []
+        for schema, partition, bound, reltuples in cur.fetchall():
+            # e.g. "FOR VALUES FROM ('2023-01-01') TO ('2023-02-01')"; the
+            # upper bound is exclusive. DEFAULT and MAXVALUE never match, and
+            # neither do bounds Python cannot parse, such as 'infinity' or
+            # BC dates.
+            upper = re.search(r"TO \('([^']+)'\)", bound)
+            if not upper:
+                continue
+            try:
+                upper = datetime.fromisoformat(upper.group(1))
+            except ValueError:
+                continue
+            upper = upper.replace(tzinfo=None)
+            if upper <= cutoff:
+                expired.append((schema, partition, reltuples))
+
+        # reltuples is -1 until a partition is first vacuumed or analyzed;
+        # only those are counted. All counting happens before the first
+        # DROP, which holds ACCESS EXCLUSIVE on the parent until commit.
+        dropped = []
+        for schema, partition, reltuples in expired:
+            if reltuples < 0:
+                cur.execute(
+                    sql.SQL("SELECT count(*) FROM {p}").format(
+                        p=sql.Identifier(schema, partition)
+                    )
+                )
+                rows = cur.fetchone()[0]
+            else:
+                rows = int(reltuples)
+            dropped.append((partition, rows))
+
+        for schema, partition, _ in expired:
+            cur.execute(
+                sql.SQL("DROP TABLE {p}").format(
+                    p=sql.Identifier(schema, partition)
+                )
+            )
         conn.commit()
 
-def add_column(table_name, column_name, data_type):
+    if dropped:
+        invalidate_schema_cache()
+    return dropped
+
+def truncate_table(table_name):
+    # TRUNCATE swaps in empty files instead of deleting row by row, frees the
+    # disk space immediately and leaves no dead tuples for VACUUM.
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute(
-            f"ALTER TABLE {table_name} ADD COLUMN {column_name} {data_type}"
+            sql.SQL("TRUNCATE TABLE {t} RESTART IDENTITY").format(
+                t=sql.Identifier(table_name)
+            )
         )
         conn.commit()
 
-def drop_column(table_name, column_name):
+def drop_table(table_name):
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            sql.SQL("DROP TABLE {t}").format(t=sql.Identifier(table_name))
+        )
+        conn.commit()
+    invalidate_schema_cache()
+
+def add_column_clause(column_name, data_type):
+    if data_type not in COLUMN_TYPES:
+        raise ValueError(f"Unsupported column type: {data_type}")
+
+    return sql.SQL("ADD COLUMN {c} {dt}").format(
+        c=sql.Identifier(column_name),
+        dt=sql.SQL(data_type),
+    )
+
+def drop_column_clause(column_name):
+    return sql.SQL("DROP COLUMN {c}").format(c=sql.Identifier(column_name))
+
+def alter_table_batch(table_name, clauses):
+    # A single ALTER TABLE takes the table lock once and rewrites the table
+    # at most once, however many columns it adds or drops.
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute(
-            f"ALTER TABLE {table_name} DROP COLUMN {column_name}"
+            sql.SQL("ALTER TABLE {t} ").format(t=sql.Identifier(table_name))
+            + sql.SQL(", ").join(clauses)
         )
         conn.commit()
+    invalidate_schema_cache()
+
+def add_column(table_name, column_name, data_type):
+    alter_table_batch(table_name, [add_column_clause(column_name, data_type)])
+
+def drop_column(table_name, column_name):
+    alter_table_batch(table_name, [drop_column_clause(column_name)])
 
 # =========================================================
 # DASH APP
 # =========================================================
 
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+# Row purges and table drops can run for minutes; background callbacks run
+# them in a separate process so the web worker stays free for other users.
+background_callback_manager = DiskcacheManager(shared_cache)
+
+app = dash.Dash(
+    __name__,
+    external_stylesheets=[dbc.themes.BOOTSTRAP],
+    background_callback_manager=background_callback_manager,
+)
 server = app.server
+Compress(server)
 
-tables = fetch_tables()
+@server.route("/schema")
+def schema_json():
+    # Browsers revalidate against the ETag on every load and get a bodyless
+    # 304 while the schema is unchanged; the body itself is gzipped.
+    response = jsonify(build_full_schema())
+    response.add_etag()
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response.make_conditional(request)
 
-app.layout = dbc.Container(
-    [
-        html.H2("Database Cleanup Utility 🧹", className="mt-4"),
-        html.Hr(),
+# The layout is built per page load rather than at import, so workers boot
+# without touching the database; the table list comes from the TTL cache.
+def build_layout(tables=None):
+    if tables is None:
+        tables = fetch_tables()
 
-        # ================= ROW DELETE =================
-        dbc.Alert(
-            "⚠️ Delete rows BEFORE a date using a selected column.",
-            color="warning"
-        ),
+    return dbc.Container(
+        [
+            dcc.Location(id="url", refresh=False),
+            dcc.Store(id="schema_store"),
 
-        dbc.Row([
-            dbc.Col([
-                html.Label("Select Table"),
-                dcc.Dropdown(
-                    id="table_dd",
-                    options=[{"label": t, "value": t} for t in tables],
-                    clearable=False,
-                ),
-            ], md=4),
-
-            dbc.Col([
-                html.Label("Select Date Column"),
-                dcc.Dropdown(id="date_column_dd", clearable=False),
-            ], md=4),
-
-            dbc.Col([
-                html.Label("Delete rows BEFORE date"),
-                dcc.DatePickerSingle(
-                    id="cutoff_date",
-                    max_date_allowed=date.today(),
-                    display_format="YYYY-MM-DD",
-                ),
-            ], md=4),
-        ], className="mb-3"),
-
-        dbc.Button("DELETE ROWS", id="delete_rows_btn", color="danger"),
-        html.Div(id="row_delete_status", className="mt-3"),
-
-        html.Hr(className="my-4"),
-
-        # ================= COLUMN MANAGEMENT =================
-        html.H4("🧩 Column Management"),
-
-        dbc.Row([
-            dbc.Col([
-                html.Label("Existing Columns"),
-                dcc.Dropdown(id="all_columns_dd"),
-            ], md=4),
-
-            dbc.Col([
-                html.Label("Confirm Column Name (for DROP)"),
-                dbc.Input(id="confirm_column_name", type="text"),
-            ], md=4),
-
-            dbc.Col([
-                dbc.Button(
-                    "DROP COLUMN",
-                    id="drop_column_btn",
-                    color="danger",
-                    outline=True,
-                    className="mt-4"
-                ),
-            ], md=4),
-        ]),
-
-        html.Div(id="drop_column_status", className="mt-2"),
-
-        html.Hr(),
-
-        dbc.Row([
-            dbc.Col([
-                html.Label("New Column Name"),
-                dbc.Input(id="new_column_name", type="text"),
-            ], md=4),
-
-            dbc.Col([
-                html.Label("Data Type"),
-                dcc.Dropdown(
-                    id="new_column_type",
-                    options=[
-                        {"label": "TEXT", "value": "TEXT"},
-                        {"label": "INTEGER", "value": "INTEGER"},
-                        {"label": "NUMERIC", "value": "NUMERIC"},
-                        {"label": "BOOLEAN", "value": "BOOLEAN"},
-                        {"label": "DATE", "value": "DATE"},
-                        {"label": "TIMESTAMP", "value": "TIMESTAMP"},
-                    ],
-                    clearable=False,
-                ),
-            ], md=4),
-
-            dbc.Col([
-                dbc.Button(
-                    "ADD COLUMN",
-                    id="add_column_btn",
-                    color="success",
-                    className="mt-4"
-                ),
-            ], md=4),
-        ]),
+            html.H2("Database Cleanup Utility 🧹", className="mt-4"),
+            html.Hr(),
 
-        html.Div(id="add_column_status", className="mt-2"),
+            # ================= ROW DELETE =================
+            dbc.Alert(
+                "⚠️ Delete rows BEFORE a date using a selected column.",
+                color="warning"
+            ),
 
-        html.Hr(className="my-4"),
+            dbc.Row([
+                dbc.Col([
+                    html.Label("Select Table"),
+                    dcc.Dropdown(
+                        id="table_dd",
+                        options=[{"label": t, "value": t} for t in tables],
+                        clearable=False,
+                    ),
+                ], md=4),
 
-        # ================= TABLE DELETE =================
-        html.H4("🚨 Danger Zone – Delete Entire Table", className="text-danger"),
+                dbc.Col([
+                    html.Label("Select Date Column"),
+                    dcc.Dropdown(id="date_column_dd", clearable=False),
+                ], md=4),
 
-        dbc.Alert(
-            "This will permanently DROP the selected table. "
-            "Type the exact table name to confirm.",
-            color="danger"
-        ),
+                dbc.Col([
+                    html.Label("Delete rows BEFORE date"),
+                    dcc.DatePickerSingle(
+                        id="cutoff_date",
+                        max_date_allowed=date.today(),
+                        display_format="YYYY-MM-DD",
+                    ),
+                ], md=4),
+            ], className="mb-3"),
 
-        dbc.Input(
-            id="confirm_table_name",
-            placeholder="Type table name exactly",
-            type="text"
-        ),
+            dbc.Button("DELETE ROWS", id="delete_rows_btn", color="danger"),
+            html.Div(id="row_delete_status", className="mt-3"),
 
-        dbc.Button(
-            "DROP TABLE",
-            id="drop_table_btn",
-            color="danger",
-            outline=True,
-            className="mt-2"
-        ),
+            html.P(
+                "Tables partitioned by month on the date column drop whole "
+                "partitions instead of deleting row by row. Converting copies "
+                "every row and blocks writes while it runs. Type the exact "
+                "table name to confirm.",
+                className="text-muted mt-3 mb-1",
+            ),
+            dbc.Input(
+                id="confirm_partition_table",
+                placeholder="Type table name exactly",
+                type="text",
+                className="mb-2",
+            ),
+            dbc.Button(
+                "PARTITION BY MONTH",
+                id="partition_btn",
+                color="secondary",
+                outline=True,
+            ),
+            html.Div(id="partition_status", className="mt-3"),
 
-        html.Div(id="table_delete_status", className="mt-3"),
-    ],
-    fluid=True,
-)
+            html.Hr(className="my-4"),
+
+            # ================= COLUMN MANAGEMENT =================
+            html.H4("🧩 Column Management"),
+
+            dbc.Row([
+                dbc.Col([
+                    html.Label("Existing Columns"),
+                    dcc.Dropdown(id="all_columns_dd"),
+                ], md=4),
+
+                dbc.Col([
+                    html.Label("Confirm Column Name (for DROP)"),
+                    dbc.Input(id="confirm_column_name", type="text"),
+                ], md=4),
+
+                dbc.Col([
+                    dbc.Button(
+                        "DROP COLUMN",
+                        id="drop_column_btn",
+                        color="danger",
+                        outline=True,
+                        className="mt-4"
+                    ),
+                    dbc.Button(
+                        "QUEUE DROP",
+                        id="queue_drop_btn",
+                        color="secondary",
+                        outline=True,
+                        className="mt-4 ms-2"
+                    ),
+                ], md=4),
+            ]),
+
+            html.Div(id="drop_column_status", className="mt-2"),
+
+            html.Hr(),
+
+            dbc.Row([
+                dbc.Col([
+                    html.Label("New Column Name"),
+                    dbc.Input(id="new_column_name", type="text"),
+                ], md=4),
+
+                dbc.Col([
+                    html.Label("Data Type"),
+                    dcc.Dropdown(
+                        id="new_column_type",
+                        options=[{"label": t, "value": t} for t in COLUMN_TYPES],
+                        clearable=False,
+                    ),
+                ], md=4),
+
+                dbc.Col([
+                    dbc.Button(
+                        "ADD COLUMN",
+                        id="add_column_btn",
+                        color="success",
+                        className="mt-4"
+                    ),
+                    dbc.Button(
+                        "QUEUE ADD",
+                        id="queue_add_btn",
+                        color="secondary",
+                        outline=True,
+                        className="mt-4 ms-2"
+                    ),
+                ], md=4),
+            ]),
+
+            html.Div(id="add_column_status", className="mt-2"),
+
+            html.Hr(),
+
+            # Queued column changes are applied to the selected table as one
+            # ALTER TABLE statement.
+            html.H5("Pending Column Changes"),
+            dcc.Store(id="pending_alters", data=[]),
+            html.Div(id="pending_alters_list"),
+
+            dbc.Button(
+                "APPLY CHANGES",
+                id="apply_alters_btn",
+                color="primary",
+                className="mt-2"
+            ),
+            dbc.Button(
+                "CLEAR",
+                id="clear_alters_btn",
+                color="secondary",
+                outline=True,
+                className="mt-2 ms-2"
+            ),
+
+            html.Div(id="apply_alters_status", className="mt-2"),
+
+            html.Hr(className="my-4"),
+
+            # ================= TABLE DELETE =================
+            html.H4("🚨 Danger Zone – Delete Entire Table", className="text-danger"),
+
+            dbc.Alert(
+                "DROP permanently removes the selected table; TRUNCATE removes "
+                "all of its rows but keeps the table, its grants and views. "
+                "Type the exact table name to confirm.",
+                color="danger"
+            ),
+
+            dbc.Input(
+                id="confirm_table_name",
+                placeholder="Type table name exactly",
+                type="text"
+            ),
+
+            dbc.Button(
+                "DROP TABLE",
+                id="drop_table_btn",
+                color="danger",
+                outline=True,
+                className="mt-2"
+            ),
+            dbc.Button(
+                "TRUNCATE TABLE",
+                id="truncate_table_btn",
+                color="warning",
+                outline=True,
+                className="mt-2 ms-2"
+            ),
+
+            html.Div(id="table_delete_status", className="mt-3"),
+            html.Div(id="table_truncate_status", className="mt-3"),
+        ],
+        fluid=True,
+    )
+
+# Dash calls a layout function once to validate callbacks unless a
+# validation layout is given; supply one that needs no database.
+app.validation_layout = build_layout(tables=[])
+app.layout = build_layout
 
 # =========================================================
 # CALLBACKS
 # =========================================================
 
-@app.callback(
+# Column DDL callbacks hand back the refreshed schema store and column
+# dropdown options directly, so the UI never shows a dropped column or waits
+# for the table to be re-selected.
+NO_SCHEMA_REFRESH = (dash.no_update,) * 3
+
+def schema_refresh(table):
+    rows = fetch_columns_with_types(table)
+    return (
+        build_full_schema(),
+        [{"label": c, "value": c} for c, t in rows if t in DATE_TYPES],
+        [{"label": c, "value": c} for c, _ in rows],
+    )
+
+# The schema is fetched from /schema after the page loads rather than being
+# inlined into the layout, so the browser can reuse it via its ETag.
+clientside_callback(
+    """
+    function(_) {
+        return fetch(%s, {credentials: "same-origin"}).then(r => r.json());
+    }
+    """ % json.dumps(app.get_relative_path("/schema")),
+    Output("schema_store", "data"),
+    Input("url", "pathname"),
+)
+
+# Column dropdowns are filtered in the browser from the preloaded schema, so
+# changing the selected table never round-trips to the server.
+clientside_callback(
+    """
+    function(table, schema) {
+        if (!table) {
+            return [[], null, [], null];
+        }
+        const dateTypes = new Set(%s);
+        const cols = (schema || {})[table] || [];
+        const toOption = c => ({label: c[0], value: c[0]});
+        return [
+            cols.filter(c => dateTypes.has(c[1])).map(toOption),
+            null,
+            cols.map(toOption),
+            null
+        ];
+    }
+    """ % json.dumps(sorted(DATE_TYPES)),
     Output("date_column_dd", "options"),
     Output("date_column_dd", "value"),
     Output("all_columns_dd", "options"),
     Output("all_columns_dd", "value"),
     Input("table_dd", "value"),
+    State("schema_store", "data"),
 )
-def update_columns(table):
-    if not table:
-        return [], None, [], None
-
-    date_cols = fetch_date_columns(table)
-    all_cols = fetch_all_columns(table)
-
-    return (
-        [{"label": c, "value": c} for c in date_cols],
-        None,
-        [{"label": c, "value": c} for c in all_cols],
-        None
-    )
 
 @app.callback(
     Output("row_delete_status", "children"),
@@ -277,17 +1096,73 @@ def update_columns(table):
     State("table_dd", "value"),
     State("date_column_dd", "value"),
     State("cutoff_date", "date"),
+    background=True,
+    progress=Output("row_delete_status", "children"),
+    running=[(Output("delete_rows_btn", "disabled"), True, False)],
     prevent_initial_call=True
 )
-def handle_row_delete(_, table, column, cutoff):
+def handle_row_delete(set_progress, _, table, column, cutoff):
     if not table or not column or not cutoff:
         return dbc.Alert("Select table, column and date.", color="warning")
 
-    deleted = delete_before_date(table, column, cutoff)
-    return dbc.Alert(f"✅ Deleted {deleted} rows from {table}", color="success")
+    # Whole partitions below the cutoff are dropped outright; only the
+    # partition straddling the cutoff needs a row-by-row DELETE.
+    dropped = drop_partitions_before(table, column, cutoff)
+
+    try:
+        ensure_delete_index(table, column)
+    except Exception:
+        logger.exception("Could not index %s.%s before delete", table, column)
+
+    set_progress(dbc.Alert(f"⏳ Deleting rows from {table}…", color="info"))
+    deleted = delete_before_date(
+        table, column, cutoff,
+        on_batch=lambda total: set_progress(
+            dbc.Alert(f"⏳ Deleted {total} rows from {table} so far…", color="info")
+        ),
+    )
+
+    message = f"✅ Deleted {deleted} rows from {table}"
+    if dropped:
+        partition_rows = sum(rows for _, rows in dropped)
+        message += (
+            f" and dropped {len(dropped)} partition(s) holding about "
+            f"{partition_rows} more"
+        )
+    return dbc.Alert(message, color="success")
+
+@app.callback(
+    Output("partition_status", "children"),
+    Input("partition_btn", "n_clicks"),
+    State("table_dd", "value"),
+    State("date_column_dd", "value"),
+    State("confirm_partition_table", "value"),
+    background=True,
+    running=[(Output("partition_btn", "disabled"), True, False)],
+    prevent_initial_call=True
+)
+def handle_partition(_, table, column, confirmation):
+    if not table or not column:
+        return dbc.Alert("Select table and date column.", color="warning")
+
+    if confirmation != table:
+        return dbc.Alert("❌ Table name confirmation mismatch.", color="danger")
+
+    try:
+        months = convert_to_monthly_partitioned(table, column)
+        return dbc.Alert(
+            f"✅ {table} is now partitioned by month on {column} "
+            f"({months} monthly partition(s) plus a default).",
+            color="success",
+        )
+    except Exception as e:
+        return dbc.Alert(str(e), color="danger")
 
 @app.callback(
     Output("add_column_status", "children"),
+    Output("schema_store", "data", allow_duplicate=True),
+    Output("date_column_dd", "options", allow_duplicate=True),
+    Output("all_columns_dd", "options", allow_duplicate=True),
     Input("add_column_btn", "n_clicks"),
     State("table_dd", "value"),
     State("new_column_name", "value"),
@@ -296,16 +1171,25 @@ def handle_row_delete(_, table, column, cutoff):
 )
 def handle_add_column(_, table, col, dtype):
     if not table or not col or not dtype:
-        return dbc.Alert("Provide table, column name and type.", color="warning")
+        return (
+            dbc.Alert("Provide table, column name and type.", color="warning"),
+            *NO_SCHEMA_REFRESH,
+        )
 
     try:
         add_column(table, col, dtype)
-        return dbc.Alert(f"✅ Column '{col}' added to {table}", color="success")
+        return (
+            dbc.Alert(f"✅ Column '{col}' added to {table}", color="success"),
+            *schema_refresh(table),
+        )
     except Exception as e:
-        return dbc.Alert(str(e), color="danger")
+        return dbc.Alert(str(e), color="danger"), *NO_SCHEMA_REFRESH
 
 @app.callback(
     Output("drop_column_status", "children"),
+    Output("schema_store", "data", allow_duplicate=True),
+    Output("date_column_dd", "options", allow_duplicate=True),
+    Output("all_columns_dd", "options", allow_duplicate=True),
     Input("drop_column_btn", "n_clicks"),
     State("table_dd", "value"),
     State("all_columns_dd", "value"),
@@ -314,30 +1198,168 @@ def handle_add_column(_, table, col, dtype):
 )
 def handle_drop_column(_, table, col, confirm):
     if not table or not col or not confirm:
-        return dbc.Alert("Select column and confirm name.", color="warning")
+        return (
+            dbc.Alert("Select column and confirm name.", color="warning"),
+            *NO_SCHEMA_REFRESH,
+        )
 
     if col != confirm:
-        return dbc.Alert("❌ Column name confirmation mismatch.", color="danger")
+        return (
+            dbc.Alert("❌ Column name confirmation mismatch.", color="danger"),
+            *NO_SCHEMA_REFRESH,
+        )
 
     try:
         drop_column(table, col)
-        return dbc.Alert(f"🔥 Column '{col}' dropped from {table}", color="success")
+        return (
+            dbc.Alert(f"🔥 Column '{col}' dropped from {table}", color="success"),
+            *schema_refresh(table),
+        )
     except Exception as e:
-        return dbc.Alert(str(e), color="danger")
+        return dbc.Alert(str(e), color="danger"), *NO_SCHEMA_REFRESH
+
+@app.callback(
+    Output("pending_alters", "data"),
+    Output("apply_alters_status", "children"),
+    Input("queue_add_btn", "n_clicks"),
+    Input("queue_drop_btn", "n_clicks"),
+    Input("clear_alters_btn", "n_clicks"),
+    Input("table_dd", "value"),
+    State("new_column_name", "value"),
+    State("new_column_type", "value"),
+    State("all_columns_dd", "value"),
+    State("confirm_column_name", "value"),
+    State("pending_alters", "data"),
+    prevent_initial_call=True
+)
+def queue_alter(_, __, ___, table, new_col, dtype, col, confirm, pending):
+    # Pending changes belong to one table, so switching tables discards them.
+    if dash.ctx.triggered_id in ("clear_alters_btn", "table_dd"):
+        return [], None
+
+    if dash.ctx.triggered_id == "queue_add_btn":
+        if not table or not new_col or not dtype:
+            return dash.no_update, dbc.Alert(
+                "Provide table, column name and type.", color="warning"
+            )
+        change = {"op": "add", "column": new_col, "type": dtype}
+    else:
+        if not table or not col or not confirm:
+            return dash.no_update, dbc.Alert(
+                "Select column and confirm name.", color="warning"
+            )
+        if col != confirm:
+            return dash.no_update, dbc.Alert(
+                "❌ Column name confirmation mismatch.", color="danger"
+            )
+        change = {"op": "drop", "column": col}
+
+    return pending + [change], None
+
+@app.callback(
+    Output("pending_alters_list", "children"),
+    Input("pending_alters", "data"),
+)
+def render_pending_alters(pending):
+    if not pending:
+        return html.Small("No pending changes.", className="text-muted")
+
+    return html.Ul([
+        html.Li(
+            f"ADD COLUMN {c['column']} {c['type']}" if c["op"] == "add"
+            else f"DROP COLUMN {c['column']}"
+        )
+        for c in pending
+    ])
+
+@app.callback(
+    Output("apply_alters_status", "children", allow_duplicate=True),
+    Output("pending_alters", "data", allow_duplicate=True),
+    Output("schema_store", "data", allow_duplicate=True),
+    Output("date_column_dd", "options", allow_duplicate=True),
+    Output("all_columns_dd", "options", allow_duplicate=True),
+    Input("apply_alters_btn", "n_clicks"),
+    State("table_dd", "value"),
+    State("pending_alters", "data"),
+    prevent_initial_call=True
+)
+def handle_apply_alters(_, table, pending):
+    if not table or not pending:
+        return (
+            dbc.Alert("Queue at least one column change.", color="warning"),
+            dash.no_update,
+            *NO_SCHEMA_REFRESH,
+        )
+
+    try:
+        clauses = [
+            add_column_clause(c["column"], c["type"]) if c["op"] == "add"
+            else drop_column_clause(c["column"])
+            for c in pending
+        ]
+        alter_table_batch(table, clauses)
+        return (
+            dbc.Alert(
+                f"✅ Applied {len(pending)} column change(s) to {table}",
+                color="success",
+            ),
+            [],
+            *schema_refresh(table),
+        )
+    except Exception as e:
+        return (
+            dbc.Alert(str(e), color="danger"),
+            dash.no_update,
+            *NO_SCHEMA_REFRESH,
+        )
 
 @app.callback(
     Output("table_delete_status", "children"),
+    Output("schema_store", "data", allow_duplicate=True),
+    Output("table_dd", "options"),
+    Output("table_dd", "value"),
     Input("drop_table_btn", "n_clicks"),
     State("table_dd", "value"),
     State("confirm_table_name", "value"),
+    background=True,
+    running=[(Output("drop_table_btn", "disabled"), True, False)],
     prevent_initial_call=True
 )
 def handle_table_delete(_, table, confirmation):
     if not table or confirmation != table:
-        return dbc.Alert("❌ Table name confirmation mismatch.", color="danger")
+        return (
+            dbc.Alert("❌ Table name confirmation mismatch.", color="danger"),
+            dash.no_update,
+            dash.no_update,
+            dash.no_update,
+        )
 
     drop_table(table)
-    return dbc.Alert(f"🔥 Table '{table}' deleted.", color="success")
+    return (
+        dbc.Alert(f"🔥 Table '{table}' deleted.", color="success"),
+        build_full_schema(),
+        [{"label": t, "value": t} for t in fetch_tables()],
+        None,
+    )
+
+@app.callback(
+    Output("table_truncate_status", "children"),
+    Input("truncate_table_btn", "n_clicks"),
+    State("table_dd", "value"),
+    State("confirm_table_name", "value"),
+    background=True,
+    running=[(Output("truncate_table_btn", "disabled"), True, False)],
+    prevent_initial_call=True
+)
+def handle_table_truncate(_, table, confirmation):
+    if not table or confirmation != table:
+        return dbc.Alert("❌ Table name confirmation mismatch.", color="danger")
+
+    try:
+        truncate_table(table)
+        return dbc.Alert(f"🧹 Table '{table}' truncated.", color="success")
+    except Exception as e:
+        return dbc.Alert(str(e), color="danger")
 
 # =========================================================
 # MAIN